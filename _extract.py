@@ -0,0 +1,108 @@
+"""
+Blob event field extraction.
+
+Kept free of Azure Functions imports so it can be compiled with mypyc
+(`mypyc _extract.py`); the function app imports the compiled module
+transparently when it is present.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+# Default values for blob event data fields
+_BLOB_DEFAULTS: Dict[str, Any] = {
+    'url': '',
+    'api': '',
+    'clientRequestId': '',
+    'requestId': '',
+    'eTag': '',
+    'contentType': '',
+    'contentLength': 0,
+    'blobType': '',
+    'sequencer': ''
+}
+
+# Mapping of event data keys to blob info keys
+_BLOB_KEY_MAP: Tuple[Tuple[str, str], ...] = (
+    ('url', 'url'),
+    ('api', 'api'),
+    ('clientRequestId', 'client_request_id'),
+    ('requestId', 'request_id'),
+    ('eTag', 'etag'),
+    ('contentType', 'content_type'),
+    ('contentLength', 'content_length'),
+    ('blobType', 'blob_type'),
+    ('sequencer', 'sequencer')
+)
+
+def split_blob_url(url: str) -> Tuple[str, str]:
+    """
+    Split a blob URL into its container and blob names.
+    
+    Args:
+        url: The blob URL
+        
+    Returns:
+        Tuple of (container_name, blob_name)
+    """
+    parts = url.rsplit('/', 2)
+    return (parts[-2] if len(parts) >= 2 else '', parts[-1])
+
+def extract_blob_info(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract blob information from the CloudEvent data.
+    
+    Args:
+        event_data: The event data from the CloudEvent
+        
+    Returns:
+        Dictionary containing blob information
+    """
+    merged = {**_BLOB_DEFAULTS, **event_data}
+    blob_info = {py_key: merged[json_key] for json_key, py_key in _BLOB_KEY_MAP}
+    
+    # Extract blob name from URL
+    url = blob_info['url']
+    if isinstance(url, str) and url:
+        blob_info['container_name'], blob_info['blob_name'] = split_blob_url(url)
+    
+    return blob_info
+
+def extract_blob_created(event_data: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Extract blob and event information from a complete BlobCreated CloudEvent.
+    
+    Reads every field by direct indexing instead of merging defaults.
+    
+    Args:
+        event_data: CloudEvent data
+        
+    Returns:
+        Tuple of (blob_info, event_info), or None if a field was missing
+    """
+    try:
+        data = event_data['data']
+        url: Any = data['url']
+        event_info: Dict[str, Any] = {
+            'id': event_data['id'],
+            'source': event_data['source'],
+            'subject': event_data['subject'],
+            'event_type': event_data['type'],
+            'event_time': event_data['time'],
+            'spec_version': event_data['specversion']
+        }
+        blob_info: Dict[str, Any] = {
+            'url': url,
+            'api': data['api'],
+            'client_request_id': data['clientRequestId'],
+            'request_id': data['requestId'],
+            'etag': data['eTag'],
+            'content_type': data['contentType'],
+            'content_length': data['contentLength'],
+            'blob_type': data['blobType'],
+            'sequencer': data['sequencer']
+        }
+    except (KeyError, TypeError):
+        return None
+    
+    if isinstance(url, str) and url:
+        blob_info['container_name'], blob_info['blob_name'] = split_blob_url(url)
+    return blob_info, event_info
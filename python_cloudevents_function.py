@@ -1,19 +1,56 @@
-import json
+import asyncio
 import logging
+from datetime import datetime, timezone
 import azure.functions as func
 from azure.messaging import CloudEvent
 from typing import Dict, Any
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from _extract import extract_blob_info, extract_blob_created
+
+# JSON serialization: prefer orjson, fall back to the standard library
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=str).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(',', ':'), default=str)
+
+    _loads = json.loads
+
+# Configure logging; the Functions host attaches the log handlers
 logger = logging.getLogger(__name__)
 
 # Function App configuration
 app = func.FunctionApp()
 
+# Default values for CloudEvent envelope fields
+_CLOUDEVENT_DEFAULTS = {
+    'specversion': '1.0',
+    'type': '',
+    'source': '',
+    'id': '',
+    'subject': '',
+    'time': '',
+    'data': {}
+}
+
+# Resolve the data_version accessor once, based on the EventGridEvent schema
+if hasattr(func.EventGridEvent, 'data_version'):
+    def _get_data_version(event: func.EventGridEvent) -> Any:
+        return event.data_version
+else:
+    def _get_data_version(event: func.EventGridEvent) -> Any:
+        return 'unknown'
+
 @app.function_name(name="BlobCreatedHandler")
 @app.event_grid_trigger(arg_name="event")
-def blob_created_handler(event: func.EventGridEvent) -> None:
+async def blob_created_handler(event: func.EventGridEvent) -> None:
     """
     Azure Function that handles Blob Created events in CloudEvents v1.0 format.
     
@@ -21,71 +58,40 @@ def blob_created_handler(event: func.EventGridEvent) -> None:
     It processes the CloudEvent and extracts relevant information about the blob.
     """
     
+    # Log the raw event for debugging
+    logger.info("Raw event received: %s", event)
+    
+    # Extract CloudEvent metadata
+    event_info = {
+        'id': event.id,
+        'source': event.source,
+        'subject': event.subject,
+        'event_type': event.event_type,
+        'event_time': event.event_time,
+        'data_version': _get_data_version(event)
+    }
+    
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("CloudEvent metadata: %s", _dumps(event_info))
+    
     try:
-        # Log the raw event for debugging
-        logger.info(f"Raw event received: {event}")
-        
         # Extract CloudEvent data
         event_data = event.get_json()
         
-        # Extract CloudEvent metadata
-        event_info = {
-            'id': event.id,
-            'source': event.source,
-            'subject': event.subject,
-            'event_type': event.event_type,
-            'event_time': event.event_time,
-            'data_version': getattr(event, 'data_version', 'unknown')
-        }
-        
-        logger.info(f"CloudEvent metadata: {json.dumps(event_info, indent=2, default=str)}")
-        
         # Process the blob creation event
-        if event_data:
-            blob_info = extract_blob_info(event_data)
-            process_blob_created(blob_info, event_info)
-        else:
+        if not event_data:
             logger.warning("No event data found in CloudEvent")
+        elif not isinstance(event_data, dict):
+            logger.warning("Skipping CloudEvent %s: data is not an object", event_info['id'])
+        else:
+            blob_info = extract_blob_info(event_data)
+            await process_blob_created(blob_info, event_info)
             
     except Exception as e:
-        logger.error(f"Error processing CloudEvent: {str(e)}")
+        logger.error("Error processing CloudEvent: %s", e)
         raise
 
-def extract_blob_info(event_data: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Extract blob information from the CloudEvent data.
-    
-    Args:
-        event_data: The event data from the CloudEvent
-        
-    Returns:
-        Dictionary containing blob information
-    """
-    try:
-        blob_info = {
-            'url': event_data.get('url', ''),
-            'api': event_data.get('api', ''),
-            'client_request_id': event_data.get('clientRequestId', ''),
-            'request_id': event_data.get('requestId', ''),
-            'etag': event_data.get('eTag', ''),
-            'content_type': event_data.get('contentType', ''),
-            'content_length': event_data.get('contentLength', 0),
-            'blob_type': event_data.get('blobType', ''),
-            'sequencer': event_data.get('sequencer', '')
-        }
-        
-        # Extract blob name from URL
-        if blob_info['url']:
-            blob_info['blob_name'] = blob_info['url'].split('/')[-1]
-            blob_info['container_name'] = blob_info['url'].split('/')[-2]
-        
-        return blob_info
-        
-    except Exception as e:
-        logger.error(f"Error extracting blob info: {str(e)}")
-        return {}
-
-def process_blob_created(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
+async def process_blob_created(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
     """
     Process the blob created event.
     
@@ -94,30 +100,32 @@ def process_blob_created(blob_info: Dict[str, Any], event_info: Dict[str, Any])
         event_info: CloudEvent metadata
     """
     
-    logger.info(f"Processing blob creation:")
-    logger.info(f"  - Blob Name: {blob_info.get('blob_name', 'Unknown')}")
-    logger.info(f"  - Container: {blob_info.get('container_name', 'Unknown')}")
-    logger.info(f"  - Content Type: {blob_info.get('content_type', 'Unknown')}")
-    logger.info(f"  - Content Length: {blob_info.get('content_length', 0)} bytes")
-    logger.info(f"  - Event Time: {event_info.get('event_time', 'Unknown')}")
+    logger.info(
+        "blob_created: name=%s container=%s content_type=%s content_length=%s event_time=%s",
+        blob_info.get('blob_name', 'Unknown'),
+        blob_info.get('container_name', 'Unknown'),
+        blob_info.get('content_type', 'Unknown'),
+        blob_info.get('content_length', 0),
+        event_info.get('event_time', 'Unknown')
+    )
     
     # Example processing logic
     blob_name = blob_info.get('blob_name', '')
     content_type = blob_info.get('content_type', '')
     
     # Process different file types
-    if content_type.startswith('image/'):
-        process_image_blob(blob_info, event_info)
-    elif content_type.startswith('text/'):
-        process_text_blob(blob_info, event_info)
-    elif content_type == 'application/json':
-        process_json_blob(blob_info, event_info)
-    else:
-        process_generic_blob(blob_info, event_info)
+    handler = (_CONTENT_TYPE_HANDLERS.get(content_type)
+               or _CONTENT_TYPE_HANDLERS.get(content_type.partition('/')[0], process_generic_blob))
+    await handler(blob_info, event_info)
+
+# Blob processors run on the worker's event loop, not its thread pool.
+# Blocking work (image resizing, database drivers, synchronous SDK calls)
+# would stall every concurrent invocation: run it through
+# asyncio.to_thread() or use async clients such as azure.storage.blob.aio.
 
-def process_image_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
+async def process_image_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
     """Process image blob creation."""
-    logger.info(f"Processing image blob: {blob_info.get('blob_name')}")
+    logger.info("Processing image blob: %s", blob_info.get('blob_name'))
     
     # Example: Trigger image processing pipeline
     # - Resize image
@@ -125,49 +133,56 @@ def process_image_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) ->
     # - Generate thumbnails
     # - Update database
     
-    # Your image processing logic here
+    # Your image processing logic here (non-blocking, see above)
     pass
 
-def process_text_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
+async def process_text_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
     """Process text blob creation."""
-    logger.info(f"Processing text blob: {blob_info.get('blob_name')}")
+    logger.info("Processing text blob: %s", blob_info.get('blob_name'))
     
     # Example: Process text file
     # - Parse content
     # - Extract keywords
     # - Store in search index
     
-    # Your text processing logic here
+    # Your text processing logic here (non-blocking, see above)
     pass
 
-def process_json_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
+async def process_json_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
     """Process JSON blob creation."""
-    logger.info(f"Processing JSON blob: {blob_info.get('blob_name')}")
+    logger.info("Processing JSON blob: %s", blob_info.get('blob_name'))
     
     # Example: Process JSON data
     # - Validate schema
     # - Transform data
     # - Store in database
     
-    # Your JSON processing logic here
+    # Your JSON processing logic here (non-blocking, see above)
     pass
 
-def process_generic_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
+async def process_generic_blob(blob_info: Dict[str, Any], event_info: Dict[str, Any]) -> None:
     """Process generic blob creation."""
-    logger.info(f"Processing generic blob: {blob_info.get('blob_name')}")
+    logger.info("Processing generic blob: %s", blob_info.get('blob_name'))
     
     # Example: Generic processing
     # - Log event
     # - Send notification
     # - Update metadata
     
-    # Your generic processing logic here
+    # Your generic processing logic here (non-blocking, see above)
     pass
 
+# Content type handlers, keyed by full MIME type or top-level type
+_CONTENT_TYPE_HANDLERS = {
+    'image': process_image_blob,
+    'text': process_text_blob,
+    'application/json': process_json_blob
+}
+
 # Alternative HTTP trigger for CloudEvents (if EventGrid trigger doesn't work)
 @app.function_name(name="BlobCreatedHttpHandler")
 @app.route(route="cloudevents", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST", "OPTIONS"])
-def blob_created_http_handler(req: func.HttpRequest) -> func.HttpResponse:
+async def blob_created_http_handler(req: func.HttpRequest) -> func.HttpResponse:
     """
     Alternative HTTP trigger for handling CloudEvents v1.0.
     
@@ -197,28 +212,45 @@ def blob_created_http_handler(req: func.HttpRequest) -> func.HttpResponse:
             
             # Get the request body
             try:
-                event_data = req.get_json()
+                raw_body = req.get_body()
+                event_data = _loads(raw_body)
                 if not event_data:
                     logger.error("No JSON data in request")
                     return func.HttpResponse(status_code=400)
                 
-                # Process CloudEvent
-                process_cloudevent_http(event_data)
+                # Log the body as received; it is already JSON text
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("CloudEvent received: %s", raw_body.decode('utf-8', 'replace'))
+                
+                # Process CloudEvent (batched deliveries arrive as a JSON array)
+                if isinstance(event_data, list):
+                    # Let every event finish before reporting any failure
+                    results = await asyncio.gather(
+                        *(process_cloudevent_http(item) for item in event_data),
+                        return_exceptions=True
+                    )
+                    failures = [r for r in results if isinstance(r, BaseException)]
+                    for failure in failures:
+                        logger.error("Error processing CloudEvent: %s", failure)
+                    if failures:
+                        return func.HttpResponse(status_code=500)
+                else:
+                    await process_cloudevent_http(event_data)
                 
                 return func.HttpResponse(status_code=200)
                 
             except Exception as e:
-                logger.error(f"Error processing CloudEvent: {str(e)}")
+                logger.error("Error processing CloudEvent: %s", e)
                 return func.HttpResponse(status_code=500)
         
         else:
             return func.HttpResponse(status_code=405)
             
     except Exception as e:
-        logger.error(f"Error in HTTP CloudEvent handler: {str(e)}")
+        logger.error("Error in HTTP CloudEvent handler: %s", e)
         return func.HttpResponse(status_code=500)
 
-def process_cloudevent_http(event_data: Dict[str, Any]) -> None:
+async def process_cloudevent_http(event_data: Dict[str, Any]) -> None:
     """
     Process CloudEvent received via HTTP.
     
@@ -226,27 +258,30 @@ def process_cloudevent_http(event_data: Dict[str, Any]) -> None:
         event_data: CloudEvent data
     """
     
-    logger.info(f"CloudEvent received: {json.dumps(event_data, indent=2)}")
+    # Fast path for the dominant event type
+    if event_data.get('type') == "Microsoft.Storage.BlobCreated" and await _fast_blob_created(event_data):
+        return
     
     # Extract CloudEvent fields
-    spec_version = event_data.get('specversion', '1.0')
-    event_type = event_data.get('type', '')
-    source = event_data.get('source', '')
-    event_id = event_data.get('id', '')
-    subject = event_data.get('subject', '')
-    time = event_data.get('time', '')
-    data = event_data.get('data', {})
+    fields = {**_CLOUDEVENT_DEFAULTS, **event_data}
+    spec_version = fields['specversion']
+    event_type = fields['type']
+    source = fields['source']
+    event_id = fields['id']
+    subject = fields['subject']
+    time = fields['time']
+    data = fields['data']
     
-    logger.info(f"CloudEvent Details:")
-    logger.info(f"  - Spec Version: {spec_version}")
-    logger.info(f"  - Type: {event_type}")
-    logger.info(f"  - Source: {source}")
-    logger.info(f"  - ID: {event_id}")
-    logger.info(f"  - Subject: {subject}")
-    logger.info(f"  - Time: {time}")
+    logger.info(
+        "CloudEvent details: specversion=%s type=%s source=%s id=%s subject=%s time=%s",
+        spec_version, event_type, source, event_id, subject, time
+    )
     
     # Process based on event type
     if event_type == "Microsoft.Storage.BlobCreated":
+        if not isinstance(data, dict):
+            logger.warning("Skipping CloudEvent %s: data is not an object", event_id)
+            return
         blob_info = extract_blob_info(data)
         event_info = {
             'id': event_id,
@@ -256,21 +291,47 @@ def process_cloudevent_http(event_data: Dict[str, Any]) -> None:
             'event_time': time,
             'spec_version': spec_version
         }
-        process_blob_created(blob_info, event_info)
+        await process_blob_created(blob_info, event_info)
     else:
-        logger.warning(f"Unknown event type: {event_type}")
+        logger.warning("Unknown event type: %s", event_type)
+
+async def _fast_blob_created(event_data: Dict[str, Any]) -> bool:
+    """
+    Process a complete Microsoft.Storage.BlobCreated CloudEvent.
+    
+    Args:
+        event_data: CloudEvent data
+        
+    Returns:
+        True if the event was processed, False if a field was missing and
+        the caller should fall back to the generic path
+    """
+    extracted = extract_blob_created(event_data)
+    if extracted is None:
+        return False
+    blob_info, event_info = extracted
+    
+    logger.info(
+        "CloudEvent details: specversion=%s type=%s source=%s id=%s subject=%s time=%s",
+        event_info['spec_version'], event_info['event_type'], event_info['source'],
+        event_info['id'], event_info['subject'], event_info['event_time']
+    )
+    await process_blob_created(blob_info, event_info)
+    return True
+
+# Health check response; only the timestamp varies per request
+_HEALTH_PREFIX = b'{"status":"healthy","timestamp":"'
+_HEALTH_SUFFIX = b'","version":"1.0.0"}'
+_HEALTH_HEADERS = {"Content-Type": "application/json"}
 
 # Health check endpoint
 @app.function_name(name="HealthCheck")
 @app.route(route="health", auth_level=func.AuthLevel.ANONYMOUS)
 def health_check(req: func.HttpRequest) -> func.HttpResponse:
     """Health check endpoint."""
+    timestamp = datetime.now(timezone.utc).isoformat().encode()
     return func.HttpResponse(
-        json.dumps({
-            "status": "healthy",
-            "timestamp": func.datetime.utcnow().isoformat(),
-            "version": "1.0.0"
-        }),
+        _HEALTH_PREFIX + timestamp + _HEALTH_SUFFIX,
         status_code=200,
-        headers={"Content-Type": "application/json"}
-    )
\ No newline at end of file
+        headers=_HEALTH_HEADERS
+    )